@@ -1,5 +1,6 @@
 # /puzzle-solver-api/config.py
 
+import math
 import os
 from dotenv import load_dotenv
 
@@ -15,3 +16,12 @@ load_dotenv()
 API_SECRET_TOKEN = os.getenv("API_SECRET_TOKEN")
 if not API_SECRET_TOKEN:
     raise ValueError("FATAL: API_SECRET_TOKEN environment variable not set.")
+
+# --- Solutions Database ---
+
+# Base name of the database files written by build_db.py and loaded at startup
+DB_FILENAME_BASE = os.getenv("DB_FILENAME_BASE", "puzzle_solutions")
+
+# Number of states build_db.py solves, nearest the goal first.
+# Defaults to every solvable 3x3 state (9! / 2).
+NUM_PUZZLES_TO_GENERATE = int(os.getenv("NUM_PUZZLES_TO_GENERATE", math.factorial(9) // 2))
@@ -5,9 +5,10 @@
 #include <vector>
 #include <array>
 #include <queue>
+#include <tuple>
 #include <unordered_map>
-#include <unordered_set>
-#include <cmath>      // For std::abs
+#include <cstdint>
+#include <cstdlib>    // For std::abs
 #include <algorithm>  // For std::reverse
 #include <optional>   // To handle the "no solution" case
 
@@ -16,139 +17,192 @@ using State = std::array<int, 9>;
 using Move = std::pair<int, int>;
 using Path = std::vector<Move>;
 
-// --- Custom Hasher for std::array ---
-// This is required to use std::array as a key in unordered_map/unordered_set.
-struct ArrayHasher {
-    std::size_t operator()(const State& a) const {
-        std::size_t h = 0;
-        for (auto e : a) {
-            h ^= std::hash<int>{}(e) + 0x9e3779b9 + (h << 6) + (h >> 2);
-        }
-        return h;
-    }
-};
+// A state packed into one integer, 4 bits per cell: the tile at board index i
+// lives in bits [4*i, 4*i + 4). Same layout as encode_state in puzzle_service.py.
+using Code = std::uint64_t;
 
 class PuzzleSolver {
 public:
     PuzzleSolver(int grid_size = 3) :
         grid_size_(grid_size),
-        goal_state_({1, 2, 3, 4, 5, 6, 7, 8, 0}) {}
+        goal_state_({1, 2, 3, 4, 5, 6, 7, 8, 0}) {
+        build_tables();
+    }
 
     /**
      * @brief The main A* solver function.
      * @param initial_state The starting state of the puzzle.
      * @return An std::optional containing the path of moves if a solution is found, otherwise std::nullopt.
      */
-    std::optional<Path> solve_with_a_star(const State& initial_state) {
-        if (initial_state == goal_state_) {
+    std::optional<Path> solve_with_a_star(const State& initial_state) const {
+        // The packed encoding and the lookup tables only cover tiles 0-8.
+        if (!is_valid_state(initial_state)) {
+            return std::nullopt;
+        }
+
+        const Code initial_code = encode(initial_state);
+        const Code goal_code = encode(goal_state_);
+        if (initial_code == goal_code) {
             return Path{}; // Empty path
         }
 
-        // The priority queue stores pairs of (f_score, state).
-        // std::greater makes it a min-heap, so the smallest f_score is always at the top.
-        using PQElement = std::pair<int, State>;
+        // Every state seen gets an integer id; its data lives in `nodes[id]`,
+        // so the heap and the parent links only ever hold ints.
+        std::vector<Node> nodes;
+        std::unordered_map<Code, int> state_ids;
+        nodes.reserve(4096);
+        state_ids.reserve(4096);
+
+        int initial_empty = 0;
+        while (initial_state[initial_empty] != 0) ++initial_empty;
+        const int initial_h = heuristic(initial_code);
+        nodes.push_back({initial_code, 0, initial_h, -1, initial_empty});
+        state_ids.emplace(initial_code, 0);
+
+        // Heap entries are (f_score, h_score, counter, id). std::greater makes it a
+        // min-heap; ties on f prefer states nearer the goal, then insertion order.
+        using PQElement = std::tuple<int, int, int, int>;
         std::priority_queue<PQElement, std::vector<PQElement>, std::greater<PQElement>> open_heap;
-
-        // g_score map
-        std::unordered_map<State, int, ArrayHasher> g_score;
-        
-        // came_from map stores: child_state -> {parent_state, move_to_get_here}
-        std::unordered_map<State, std::pair<State, Move>, ArrayHasher> came_from;
-
-        // This set is equivalent to Python's open_set_hash
-        std::unordered_set<State, ArrayHasher> open_set_hash;
-
-        // Initialize with the start node
-        g_score[initial_state] = 0;
-        open_heap.push({heuristic(initial_state), initial_state});
-        open_set_hash.insert(initial_state);
+        open_heap.push({initial_h, initial_h, 0, 0});
+        int counter = 1;
 
         while (!open_heap.empty()) {
-            State current_state = open_heap.top().second;
+            const auto [f_score, current_h, unused_counter, current_id] = open_heap.top();
             open_heap.pop();
-            open_set_hash.erase(current_state);
+            (void)unused_counter;
+
+            const int current_g = nodes[current_id].g;
+            // A better path pushes a fresh entry rather than updating the old one,
+            // so skip entries that no longer match the state's best g-score.
+            if (f_score - current_h > current_g) {
+                continue;
+            }
 
-            if (current_state == goal_state_) {
-                return reconstruct_move_path(came_from, current_state);
+            const Code current_code = nodes[current_id].code;
+            if (current_code == goal_code) {
+                return reconstruct_move_path(nodes, current_id);
             }
 
-            int empty_index = -1;
-            for (size_t i = 0; i < current_state.size(); ++i) {
-                if (current_state[i] == 0) {
-                    empty_index = i;
-                    break;
+            const int empty_index = nodes[current_id].empty;
+            for (int k = 0; k < 4; ++k) {
+                const int tile_index = neighbors_[empty_index][k];
+                if (tile_index < 0) break;
+
+                // The empty nibble is 0, so sliding the tile is two XORs.
+                const Code tile = (current_code >> (4 * tile_index)) & 0xF;
+                const Code neighbor_code = current_code ^ (tile << (4 * empty_index)) ^ (tile << (4 * tile_index));
+                const int tentative_g_score = current_g + 1;
+
+                auto [it, inserted] = state_ids.try_emplace(neighbor_code, static_cast<int>(nodes.size()));
+                const int neighbor_id = it->second;
+                if (inserted) {
+                    // Only the moved tile's distance changes, so update h with two lookups.
+                    const int neighbor_h = current_h - manhattan_[tile][tile_index] + manhattan_[tile][empty_index];
+                    nodes.push_back({neighbor_code, tentative_g_score, neighbor_h, current_id, tile_index});
+                } else if (tentative_g_score < nodes[neighbor_id].g) {
+                    nodes[neighbor_id].g = tentative_g_score;
+                    nodes[neighbor_id].parent = current_id;
+                } else {
+                    continue;
                 }
+
+                const int neighbor_h = nodes[neighbor_id].h;
+                open_heap.push({tentative_g_score + neighbor_h, neighbor_h, counter++, neighbor_id});
             }
+        }
+
+        return std::nullopt; // No solution found
+    }
+
+    /**
+     * @brief Checks that the state holds each tile 0-8 exactly once.
+     */
+    static bool is_valid_state(const State& state) {
+        unsigned seen = 0;
+        for (int tile : state) {
+            if (tile < 0 || tile > 8 || (seen >> tile) & 1u) {
+                return false;
+            }
+            seen |= 1u << tile;
+        }
+        return true;
+    }
 
+private:
+    struct Node {
+        Code code;
+        int g;
+        int h;
+        int parent;
+        int empty;
+    };
+
+    int grid_size_;
+    State goal_state_;
+    // neighbors_[empty][k]: board index of a tile that can slide into `empty`, -1 padded.
+    std::array<std::array<int, 4>, 9> neighbors_;
+    // manhattan_[tile][position]: the tile's distance from its goal cell (row 0 is the empty tile).
+    std::array<std::array<int, 9>, 9> manhattan_;
+
+    void build_tables() {
+        for (int empty_index = 0; empty_index < 9; ++empty_index) {
+            neighbors_[empty_index].fill(-1);
             int empty_r = empty_index / grid_size_;
             int empty_c = empty_index % grid_size_;
-
-            // Explore neighbors
-            for (const auto& move : std::vector<Move>{{0, 1}, {0, -1}, {1, 0}, {-1, 0}}) {
+            int k = 0;
+            for (const auto& move : std::array<Move, 4>{{{0, 1}, {0, -1}, {1, 0}, {-1, 0}}}) {
                 int tile_r = empty_r + move.first;
                 int tile_c = empty_c + move.second;
-
                 if (tile_r >= 0 && tile_r < grid_size_ && tile_c >= 0 && tile_c < grid_size_) {
-                    int tile_index = tile_r * grid_size_ + tile_c;
-                    State neighbor_state = current_state;
-                    std::swap(neighbor_state[empty_index], neighbor_state[tile_index]);
-
-                    int tentative_g_score = g_score.at(current_state) + 1;
-
-                    if (!g_score.count(neighbor_state) || tentative_g_score < g_score.at(neighbor_state)) {
-                        came_from[neighbor_state] = {current_state, {tile_r, tile_c}};
-                        g_score[neighbor_state] = tentative_g_score;
-                        int f_score = tentative_g_score + heuristic(neighbor_state);
-
-                        if (open_set_hash.find(neighbor_state) == open_set_hash.end()) {
-                            open_heap.push({f_score, neighbor_state});
-                            open_set_hash.insert(neighbor_state);
-                        }
-                    }
+                    neighbors_[empty_index][k++] = tile_r * grid_size_ + tile_c;
                 }
             }
         }
 
-        return std::nullopt; // No solution found
+        for (int num = 0; num < 9; ++num) {
+            for (int i = 0; i < 9; ++i) {
+                if (num == 0) {
+                    manhattan_[num][i] = 0;
+                    continue;
+                }
+                int goal_index = num - 1;
+                manhattan_[num][i] = std::abs(i / grid_size_ - goal_index / grid_size_)
+                                   + std::abs(i % grid_size_ - goal_index % grid_size_);
+            }
+        }
     }
 
-private:
-    int grid_size_;
-    State goal_state_;
+    static Code encode(const State& state) {
+        Code code = 0;
+        for (size_t i = 0; i < state.size(); ++i) {
+            code |= static_cast<Code>(state[i]) << (4 * i);
+        }
+        return code;
+    }
 
     /**
      * @brief Calculates the Manhattan distance heuristic.
      */
-    int heuristic(const State& state) const {
+    int heuristic(Code code) const {
         int distance = 0;
-        for (size_t i = 0; i < state.size(); ++i) {
-            int num = state[i];
-            if (num != 0) {
-                int goal_index = num - 1;
-                int current_r = i / grid_size_;
-                int current_c = i % grid_size_;
-                int goal_r = goal_index / grid_size_;
-                int goal_c = goal_index % grid_size_;
-                distance += std::abs(current_r - goal_r) + std::abs(current_c - goal_c);
-            }
+        for (int i = 0; i < 9; ++i) {
+            distance += manhattan_[(code >> (4 * i)) & 0xF][i];
         }
         return distance;
     }
 
     /**
-     * @brief Reconstructs the path of moves from the came_from map.
+     * @brief Reconstructs the path of moves by following parent ids back to the start.
+     * The tile moved to reach a state sits where that state's empty cell is.
      */
-    Path reconstruct_move_path(
-        const std::unordered_map<State, std::pair<State, Move>, ArrayHasher>& came_from,
-        State current_state
-    ) const {
+    Path reconstruct_move_path(const std::vector<Node>& nodes, int current_id) const {
         Path total_path;
-        while (came_from.count(current_state)) {
-            const auto& record = came_from.at(current_state);
-            total_path.push_back(record.second);
-            current_state = record.first;
+        while (nodes[current_id].parent != -1) {
+            const int tile_index = nodes[current_id].empty;
+            total_path.push_back({tile_index / grid_size_, tile_index % grid_size_});
+            current_id = nodes[current_id].parent;
         }
         std::reverse(total_path.begin(), total_path.end());
         return total_path;
     }
-};
\ No newline at end of file
+};
@@ -2,6 +2,7 @@
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>      // Required for automatic type conversion (vector, optional, etc.)
 #include <pybind11/operators.h> // For comparing states if needed
+#include <string_view>
 
 #include "PuzzleSolver.hpp"
 
@@ -16,6 +17,31 @@ PYBIND11_MODULE(cpp_solver, m) {
     // Expose the 'solve_with_a_star' function to Python.
     // We name it "solve" in Python for convenience.
     // We use a lambda function to wrap the C++ class instantiation and method call.
+
+    // Fast path: one byte per tile, e.g. `solve(bytes(state))`. The tiles are read
+    // straight from the bytes buffer instead of unboxing nine Python ints.
+    // Registered first so pybind11 tries it before the list overload below.
+    m.def("solve", [](const py::bytes& state_bytes) -> std::optional<Path> {
+        std::string_view data = state_bytes;
+        if (data.size() != 9) {
+            throw std::runtime_error("Input state must contain exactly 9 bytes.");
+        }
+
+        State initial_state;
+        for (size_t i = 0; i < 9; ++i) {
+            initial_state[i] = static_cast<unsigned char>(data[i]);
+        }
+        if (!PuzzleSolver::is_valid_state(initial_state)) {
+            throw std::runtime_error("Input state must hold each tile 0-8 exactly once.");
+        }
+
+        // The bytes object is no longer needed, so drop the GIL for the search.
+        py::gil_scoped_release release;
+        PuzzleSolver solver;
+        return solver.solve_with_a_star(initial_state);
+
+    }, "Solves a 3x3 puzzle, given as 9 bytes, using the A* algorithm");
+
     m.def("solve", [](const std::vector<int>& state_list) -> std::optional<Path> {
         if (state_list.size() != 9) {
             throw std::runtime_error("Input state must contain exactly 9 integers.");
@@ -28,5 +54,7 @@ PYBIND11_MODULE(cpp_solver, m) {
         PuzzleSolver solver;
         return solver.solve_with_a_star(initial_state);
 
-    }, "Solves a 3x3 puzzle using the A* algorithm");
+    // The search touches no Python objects, so drop the GIL while it runs.
+    // This lets several threads solve puzzles on separate cores at once.
+    }, py::call_guard<py::gil_scoped_release>(), "Solves a 3x3 puzzle using the A* algorithm");
 }
\ No newline at end of file
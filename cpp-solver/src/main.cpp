@@ -34,6 +34,11 @@ int main(int argc, char* argv[]) {
         std::cerr << "Error: Invalid number provided. Please provide only integers." << std::endl;
         return 1;
     }
+
+    if (!PuzzleSolver::is_valid_state(initial_state)) {
+        std::cerr << "Error: The tiles must be the numbers 0-8, each used exactly once." << std::endl;
+        return 1;
+    }
     
     PuzzleSolver solver;
     std::cout << "Solving puzzle..." << std::endl;
@@ -1,11 +1,16 @@
 # main.py
 from fastapi import FastAPI, HTTPException, Security
+from fastapi.responses import Response
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import List
+from functools import lru_cache
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from puzzle_service import PuzzleService
+from puzzle_service import PuzzleService, encode_state, decode_state
 from contextlib import asynccontextmanager
+import asyncio
+import orjson
 import config
 
 
@@ -44,12 +49,29 @@ class SolutionPath(BaseModel):
 
 # --- FastAPI Application Setup ---
 
+async def solution_writer(queue: asyncio.Queue):
+    """
+    The only code that writes to the in-memory database. Request handlers just
+    read it and queue newly solved paths here, so readers never race a writer.
+    """
+    while True:
+        solution_path = await queue.get()
+        puzzle_service.add_solution_to_database(solution_path)
+        print("New puzzle solution added to in-memory database.")
+        queue.task_done()
+
 @asynccontextmanager
 async def lifespan(app):
     print("Server starting up...")
     puzzle_service.load_database()
+    # Look up a state one move from the goal so the numba-compiled lookup helpers
+    # are compiled now rather than on the event loop during the first request.
+    puzzle_service.lookup_parent(encode_state((1, 2, 3, 4, 5, 6, 7, 0, 8)))
+    app.state.solution_queue = asyncio.Queue()
+    writer_task = asyncio.create_task(solution_writer(app.state.solution_queue))
     yield
     print("Server shutting down...")
+    writer_task.cancel()
 
 app = FastAPI(
     title="8-Puzzle Solver API",
@@ -71,13 +93,23 @@ app.add_middleware(
 # This instance will be populated at startup.
 puzzle_service = PuzzleService()
 
+def encode_solution(solution_path: List[int]) -> bytes:
+    # orjson writes the decoded state tuples as arrays
+    return orjson.dumps({"solution": [decode_state(code) for code in solution_path]})
+
+# Encoded /solve bodies for recently requested database states. Database entries
+# are never rewritten, so a cached body can't go stale.
+@lru_cache(maxsize=4096)
+def solution_payload(query_code: int) -> bytes:
+    return encode_solution(puzzle_service.solve_using_database(query_code))
+
 # --- API Endpoints ---
 @app.get("/", summary="Health Check")
 def read_root():
     """A simple health check endpoint to confirm the API is running."""
     return {
         "status": "ok",
-        "database_entries": puzzle_service.index.ntotal if puzzle_service.index else 0,
+        "database_entries": puzzle_service.database_size(),
         "message": "Welcome to the Puzzle Solver API!"
     }
 
@@ -91,16 +123,24 @@ async def solve_puzzle(puzzle: PuzzleState):
     """
     if len(puzzle.state) != 9:
         raise HTTPException(status_code=400, detail="Invalid puzzle state. Must contain 9 integers.")
+    if sorted(puzzle.state) != list(range(9)):
+        raise HTTPException(status_code=400, detail="Invalid puzzle state. Must contain each of the integers 0-8 exactly once.")
     
-    # Convert list to tuple for the service layer
-    query_state_tuple = tuple(puzzle.state)
-    
-    solution_path = puzzle_service.solve_using_database(query_state_tuple)
-    
-    if not solution_path:
-        raise HTTPException(status_code=404, detail="No solution could be found for the given puzzle state.")
-
-    # Convert tuples back to lists for the JSON response
-    solution_path_lists = [list(state) for state in solution_path]
+    # Pack the state into the service layer's integer representation
+    query_code = encode_state(tuple(puzzle.state))
     
-    return {"solution": solution_path_lists}
\ No newline at end of file
+    if puzzle_service.lookup_parent(query_code) is not None:
+        payload = solution_payload(query_code)
+    else:
+        # Not in the database: a full A* search. Both solvers release the GIL,
+        # so run it in the threadpool to keep the event loop free and let
+        # concurrent misses use separate cores.
+        solution_path = await run_in_threadpool(puzzle_service.solve_using_database, query_code)
+        if not solution_path:
+            raise HTTPException(status_code=404, detail="No solution could be found for the given puzzle state.")
+        # The database is only written by the writer task
+        app.state.solution_queue.put_nowait(solution_path)
+        payload = encode_solution(solution_path)
+
+    # The body is already encoded, so skip response_model validation entirely
+    return Response(content=payload, media_type="application/json")
\ No newline at end of file
@@ -1,232 +1,451 @@
 # puzzle_service.py
-import faiss
 import numpy as np
-import pickle
 import heapq
-from collections import deque
+import math
 from typing import List, Tuple, Dict, Optional
 import os
 from tqdm import tqdm
 
 import config
 
-DB_FILENAME_BASE = "puzzle_solutions"
+try:
+    import cpp_solver
+    CPP_SOLVER_AVAILABLE = True
+except ImportError:
+    CPP_SOLVER_AVAILABLE = False
+    print("WARNING: cpp_solver module not found. Falling back to the (slower) Python A* solver.")
+    print("Build it with 'python setup.py build_ext --inplace'.")
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    print("WARNING: numba not found. The Python A* fallback will run uncompiled (much slower).")
+
+    def njit(*args, **kwargs):
+        """Stand-in for numba.njit that leaves the function as plain Python."""
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+DB_FILENAME_BASE = config.DB_FILENAME_BASE
+
+# --- Packed State Representation ---
+# A state is stored as a single int with 4 bits per cell: the tile at board
+# index i lives in bits [4*i, 4*i + 4). Ints hash in one step and are far
+# smaller than 9-element tuples, so all dicts/sets/heaps are keyed by them.
+# Tuples only exist at the API boundary (see encode_state/decode_state).
+
+def encode_state(state: Tuple[int, ...]) -> int:
+    """Packs a tuple of tiles into a single int (4 bits per tile)."""
+    code = 0
+    for i, num in enumerate(state):
+        code |= num << (4 * i)
+    return code
+
+def decode_state(code: int, size: int = 9) -> Tuple[int, ...]:
+    """Unpacks an int produced by encode_state back into a tuple of tiles."""
+    return tuple((code >> (4 * i)) & 0xF for i in range(size))
+
+@njit(cache=True)
+def find_empty(code: int, size: int = 9) -> int:
+    """Returns the board index of the empty (0) tile in a packed state."""
+    for i in range(size):
+        if not (code >> (4 * i)) & 0xF:
+            return i
+    raise ValueError("Packed state has no empty tile.")
+
+@njit(cache=True)
+def state_rank(code: int, size: int = 9) -> int:
+    """
+    Returns the lexicographic rank (Lehmer code) of a packed permutation, a
+    unique index in [0, size!) used to address the solutions database directly.
+    """
+    rank = 0
+    for i in range(size):
+        tile = (code >> (4 * i)) & 0xF
+        smaller_after = 0
+        for j in range(i + 1, size):
+            if ((code >> (4 * j)) & 0xF) < tile:
+                smaller_after += 1
+        rank = rank * (size - i) + smaller_after
+    return rank
+
+def rank_states(codes: np.ndarray, size: int = 9) -> np.ndarray:
+    """Vectorized state_rank over a uint64 array of packed states."""
+    tiles = np.stack([(codes >> np.uint64(4 * i)) & np.uint64(0xF) for i in range(size)], axis=1)
+    ranks = np.zeros(codes.shape, dtype=np.int64)
+    for i in range(size):
+        smaller_after = (tiles[:, i + 1:] < tiles[:, i:i + 1]).sum(axis=1)
+        ranks = ranks * (size - i) + smaller_after
+    return ranks
+
+def build_neighbor_masks(grid_size: int) -> List[List[Tuple[int, int, int]]]:
+    """
+    For each empty position, lists the (tile_index, empty_shift, tile_shift)
+    triples of the tiles that can slide into it. Since the empty nibble is 0,
+    sliding the tile with value v is just `code ^ (v << empty_shift) ^ (v << tile_shift)`.
+    """
+    table = []
+    for empty_index in range(grid_size ** 2):
+        empty_r, empty_c = divmod(empty_index, grid_size)
+        moves = []
+        for dr, dc in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
+            tile_r, tile_c = empty_r + dr, empty_c + dc
+            if 0 <= tile_r < grid_size and 0 <= tile_c < grid_size:
+                tile_index = tile_r * grid_size + tile_c
+                moves.append((tile_index, 4 * empty_index, 4 * tile_index))
+        table.append(moves)
+    return table
+
+NEIGHBOR_MASKS = build_neighbor_masks(3)
+
+# Stored in place of a move for the goal state, which needs none.
+NO_MOVE = 0xFF
+# Stored for states the database has no solution for.
+NOT_IN_DATABASE = 0xFE
+
+def build_neighbor_table(neighbor_masks: List[List[Tuple[int, int, int]]]) -> np.ndarray:
+    """Flattens neighbor masks into a [positions, 4] table of tile indices, padded with -1."""
+    table = np.full((len(neighbor_masks), 4), -1, dtype=np.int64)
+    for empty_index, moves in enumerate(neighbor_masks):
+        for k, (tile_index, _, _) in enumerate(moves):
+            table[empty_index, k] = tile_index
+    return table
+
+# --- Compiled A* Kernel ---
+# Used when cpp_solver is not built. Everything below works on packed ints and
+# NumPy tables only, so numba can compile it to native code.
+
+def build_manhattan_table(grid_size: int) -> np.ndarray:
+    """
+    Returns a [tile, position] table of each tile's Manhattan distance from its
+    goal cell. The empty tile's row stays zero so it never contributes.
+    """
+    size = grid_size ** 2
+    table = np.zeros((size, size), dtype=np.int64)
+    for num in range(1, size):
+        goal_r, goal_c = divmod(num - 1, grid_size)
+        for i in range(size):
+            current_r, current_c = divmod(i, grid_size)
+            table[num, i] = abs(current_r - goal_r) + abs(current_c - goal_c)
+    return table
+
+@njit(cache=True)
+def manhattan_distance(code: int, manhattan_table: np.ndarray) -> int:
+    distance = 0
+    for i in range(manhattan_table.shape[1]):
+        distance += manhattan_table[(code >> (4 * i)) & 0xF, i]
+    return distance
+
+@njit(cache=True, nogil=True)
+def a_star_kernel(initial_code: int, goal_code: int, neighbor_table: np.ndarray, manhattan_table: np.ndarray) -> Tuple[bool, np.ndarray]:
+    """
+    A* search over packed states. Returns (found, moves), where moves lists the
+    board index of each tile slid into the empty cell, in order.
+    """
+    size = manhattan_table.shape[1]
+    # Each state seen gets an integer id; per-state data lives in parallel lists
+    # indexed by id, so the heap and the came_from links only ever hold ints.
+    state_ids = {initial_code: 0}
+    id_to_state = [initial_code]
+    empty_of = [find_empty(initial_code, size)]
+    h_score = [manhattan_distance(initial_code, manhattan_table)]
+    g_score = [0]
+    came_from = [-1]
+    # Heap entries are (f_score, h_score, counter, state_id): ties on f prefer
+    # states nearer the goal, then insertion order, so no tuple compares a state.
+    open_heap = [(h_score[0], h_score[0], 0, 0)]
+    counter = 1
+
+    while open_heap:
+        f_score, current_h, _, current_id = heapq.heappop(open_heap)
+        current_g = g_score[current_id]
+        # A better path pushes a fresh heap entry rather than updating the old
+        # one, so skip entries that no longer match the state's best g-score.
+        if f_score - current_h > current_g:
+            continue
+        current_code = id_to_state[current_id]
+        if current_code == goal_code:
+            # The tile moved to reach a state sits where that state's empty cell is.
+            moves = np.empty(current_g, dtype=np.int8)
+            for k in range(current_g - 1, -1, -1):
+                moves[k] = empty_of[current_id]
+                current_id = came_from[current_id]
+            return True, moves
+
+        empty_index = empty_of[current_id]
+        for k in range(neighbor_table.shape[1]):
+            tile_index = neighbor_table[empty_index, k]
+            if tile_index < 0:
+                break
+            tile = (current_code >> (4 * tile_index)) & 0xF
+            neighbor_code = current_code ^ (tile << (4 * empty_index)) ^ (tile << (4 * tile_index))
+            tentative_g_score = current_g + 1
+            if neighbor_code not in state_ids:
+                neighbor_id = len(id_to_state)
+                state_ids[neighbor_code] = neighbor_id
+                id_to_state.append(neighbor_code)
+                empty_of.append(tile_index)
+                # Only the moved tile's distance changes, so update h with two lookups.
+                h_score.append(current_h - manhattan_table[tile, tile_index] + manhattan_table[tile, empty_index])
+                g_score.append(tentative_g_score)
+                came_from.append(current_id)
+            else:
+                neighbor_id = state_ids[neighbor_code]
+                if tentative_g_score >= g_score[neighbor_id]:
+                    continue
+                g_score[neighbor_id] = tentative_g_score
+                came_from[neighbor_id] = current_id
+            neighbor_h = h_score[neighbor_id]
+            heapq.heappush(open_heap, (tentative_g_score + neighbor_h, neighbor_h, counter, neighbor_id))
+            counter += 1
+
+    return False, np.empty(0, dtype=np.int8)
 
 class PuzzleService:
     def __init__(self, grid_size: int = 3):
         self.grid_size = grid_size
         self.vector_dim = self.grid_size ** 2
         self.goal_state = tuple(range(1, self.vector_dim)) + (0,)
+        self.goal_code = encode_state(self.goal_state)
+        self.neighbor_masks = NEIGHBOR_MASKS if grid_size == 3 else build_neighbor_masks(grid_size)
+        self.neighbor_table = build_neighbor_table(self.neighbor_masks)
+        self.md_table = build_manhattan_table(grid_size)
         
-        self.index: Optional[faiss.Index] = None
-        self.state_to_id: Dict[Tuple[int, ...], int] = {}
-        self.id_to_state: Dict[int, Tuple[int, ...]] = {}
-        self.solutions: Dict[Tuple[int, ...], List[Tuple[int, ...]]] = {}
+        # Maps a packed state (see encode_state) to the next state on its optimal
+        # path to the goal. The goal maps to itself. Full solution paths are
+        # rebuilt on demand by reconstruct_solution_path.
+        # The saved database is one memory-mapped byte array indexed by state_rank:
+        # each entry is the board index of the tile to slide into the empty cell
+        # to reach the parent, so a lookup reads a single byte (one page) with
+        # no key search. The array is read-only once loaded. States solved
+        # afterwards are kept as code -> parent code in `new_solutions`.
+        self.db_moves = np.empty(0, dtype=np.uint8)
+        self.db_size = 0
+        self.new_solutions: Dict[int, int] = {}
         
         # S3 client initialization is completely removed.
 
     def load_database(self):
         """
-        Loads the FAISS index and metadata from the local filesystem.
-        If the files are not found, it prints a helpful message to the console.
+        Memory-maps the solutions database from the local filesystem instead of
+        copying it into RAM. Loading makes one pass over the map to count the
+        stored entries; after that, only the pages that lookups touch are read.
+        If the file is not found, it prints a helpful message to the console.
         """
-        faiss_file = f"{DB_FILENAME_BASE}.faiss"
-        meta_file = f"{DB_FILENAME_BASE}_metadata.pkl"
+        moves_file = f"{DB_FILENAME_BASE}_moves.npy"
 
-        # Check if both required database files exist locally.
-        if not os.path.exists(faiss_file) or not os.path.exists(meta_file):
+        # Check if the database file exists locally.
+        if not os.path.exists(moves_file):
             print("\n---")
-            print("WARNING: Database files not found locally.")
-            print(f"Please run 'python build_db.py' to generate '{faiss_file}' and '{meta_file}'.")
+            print("WARNING: Database file not found locally.")
+            print(f"Please run 'python build_db.py' to generate '{moves_file}'.")
             print("The service will run without a database, solving all puzzles on-the-fly (this will be slower).")
             print("---\n")
             return # Exit the function
 
-        print(f"Loading database from local files: '{faiss_file}' and '{meta_file}'...")
+        print(f"Loading database from local file: '{moves_file}'...")
         try:
-            # Load the FAISS index from the local file
-            self.index = faiss.read_index(faiss_file)
-            
-            # Load the metadata dictionary from the local pickle file
-            with open(meta_file, 'rb') as f:
-                metadata = pickle.load(f)
+            # Map the array read-only; nothing is copied into RAM up front
+            self.db_moves = np.load(moves_file, mmap_mode='r')
+            if len(self.db_moves) != math.factorial(self.vector_dim):
+                raise ValueError(f"expected {math.factorial(self.vector_dim)} entries, found {len(self.db_moves)}")
+            self.db_size = int(np.count_nonzero(self.db_moves != NOT_IN_DATABASE))
             
-            self.state_to_id = metadata['state_to_id']
-            self.id_to_state = metadata['id_to_state']
-            self.solutions = metadata['solutions']
-            
-            print(f"Database loaded successfully with {self.index.ntotal} solutions.")
+            print(f"Database loaded successfully with {self.db_size} solutions.")
 
         except Exception as e:
+            self.db_moves, self.db_size = np.empty(0, dtype=np.uint8), 0
             print(f"An unexpected error occurred during database loading: {e}")
-            print("The database files might be corrupted. Consider rebuilding them with 'build_db.py'.")
+            print("The database file might be corrupted. Consider rebuilding it with 'build_db.py'.")
 
 
     def save_database(self):
         """
-        Saves the current in-memory database to the local filesystem.
+        Saves the current database to the local filesystem as a rank-indexed
+        move array that load_database can memory-map.
         """
-        if self.index is None or self.index.ntotal == 0:
+        if not self.database_size():
             print("Database is empty. Nothing to save.")
             return
 
-        faiss_file = f"{DB_FILENAME_BASE}.faiss"
-        meta_file = f"{DB_FILENAME_BASE}_metadata.pkl"
+        moves_file = f"{DB_FILENAME_BASE}_moves.npy"
 
-        print(f"Saving database to local files: '{faiss_file}' and '{meta_file}'...")
+        print(f"Saving database to local file: '{moves_file}'...")
         try:
-            # Save the FAISS index
-            faiss.write_index(self.index, faiss_file)
-
-            # Save the metadata dictionary
-            metadata = {'state_to_id': self.state_to_id, 'id_to_state': self.id_to_state, 'solutions': self.solutions}
-            with open(meta_file, 'wb') as f:
-                pickle.dump(metadata, f)
+            # Merge in-memory additions into a writable copy of the loaded array
+            moves = np.full(math.factorial(self.vector_dim), NOT_IN_DATABASE, dtype=np.uint8)
+            if len(self.db_moves):
+                moves[:] = self.db_moves
+            for code, parent_code in self.new_solutions.items():
+                # The move from a state to its parent slides the tile at the parent's empty cell
+                move = NO_MOVE if parent_code == code else find_empty(parent_code, self.vector_dim)
+                moves[state_rank(code, self.vector_dim)] = move
+            np.save(moves_file, moves)
             
             print("Database saved successfully to local disk.")
         
         except Exception as e:
             print(f"An error occurred while saving the database locally: {e}")
 
+    def database_size(self) -> int:
+        return self.db_size + len(self.new_solutions)
 
-    def initialize_faiss_index(self):
-        """Creates a new, empty FAISS index."""
-        self.index = faiss.IndexFlatL2(self.vector_dim)
-
-    def state_to_vector(self, state: Tuple[int, ...]) -> np.ndarray:
-        max_val = float(self.vector_dim - 1)
-        vector = np.array(state, dtype=np.float32) / max_val
-        return vector.reshape(1, -1)
-
-    def heuristic(self, state: Tuple[int, ...]) -> int:
-        distance = 0
-        for i, num in enumerate(state):
-            if num != 0:
-                goal_index = num - 1
-                current_r, current_c = divmod(i, self.grid_size)
-                goal_r, goal_c = divmod(goal_index, self.grid_size)
-                distance += abs(current_r - goal_r) + abs(current_c - goal_c)
-        return distance
-
-    def reconstruct_move_path(self, came_from: Dict, current_state: Tuple[int, ...]) -> List[Tuple[int, int]]:
-        path = []
-        while came_from[current_state] is not None:
-            parent_state, move_coords = came_from[current_state]
-            path.append(move_coords)
-            current_state = parent_state
-        return path[::-1]
-
-    def solve_with_a_star(self, initial_state: Tuple[int, ...]) -> Optional[List[Tuple[int, int]]]:
+    def lookup_parent(self, code: int) -> Optional[int]:
+        """Returns the next state on `code`'s solution path, or None if it is not in the database."""
+        if code in self.new_solutions:
+            return self.new_solutions[code]
+        if not len(self.db_moves):
+            return None
+        tile_index = int(self.db_moves[state_rank(code, self.vector_dim)])
+        if tile_index == NOT_IN_DATABASE:
+            return None
+        if tile_index == NO_MOVE:
+            return code
+        empty_index = find_empty(code, self.vector_dim)
+        tile = (code >> (4 * tile_index)) & 0xF
+        return code ^ (tile << (4 * empty_index)) ^ (tile << (4 * tile_index))
+
+
+    def solve_with_a_star(self, initial_code: int) -> Optional[List[Tuple[int, int]]]:
         if CPP_SOLVER_AVAILABLE:
             # pybind11 automatically converts the C++ std::optional<Path>
             # to either a Python list of tuples or None. It's seamless.
-            return cpp_solver.solve(list(initial_state))
+            # Tiles are 0-8, so bytes() packs the state one byte per tile for
+            # the binding's buffer fast path.
+            return cpp_solver.solve(bytes(decode_state(initial_code, self.vector_dim)))
         else:
-            if initial_state == self.goal_state: 
-                return []
-            open_heap = [(self.heuristic(initial_state), initial_state)]
-            open_set_hash = {initial_state}
-            came_from = {initial_state: None}
-            g_score = {initial_state: 0}
-            
-            while open_heap:
-                current_state = heapq.heappop(open_heap)[1]
-                open_set_hash.remove(current_state)
-                if current_state == self.goal_state: return self.reconstruct_move_path(came_from, current_state)
-                empty_index = current_state.index(0)
-                empty_r, empty_c = divmod(empty_index, self.grid_size)
-                for dr, dc in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-                    tile_r, tile_c = empty_r + dr, empty_c + dc
-                    if not (0 <= tile_r < self.grid_size and 0 <= tile_c < self.grid_size): continue
-                    tile_index = tile_r * self.grid_size + tile_c
-                    new_state_list = list(current_state)
-                    new_state_list[empty_index], new_state_list[tile_index] = new_state_list[tile_index], new_state_list[empty_index]
-                    neighbor_state = tuple(new_state_list)
-                    tentative_g_score = g_score[current_state] + 1
-                    if tentative_g_score < g_score.get(neighbor_state, float('inf')):
-                        came_from[neighbor_state] = (current_state, (tile_r, tile_c))
-                        g_score[neighbor_state] = tentative_g_score
-                        f_score = tentative_g_score + self.heuristic(neighbor_state)
-                        if neighbor_state not in open_set_hash:
-                            heapq.heappush(open_heap, (f_score, neighbor_state))
-                            open_set_hash.add(neighbor_state)
-            return None
+            found, moves = a_star_kernel(initial_code, self.goal_code, self.neighbor_table, self.md_table)
+            if not found:
+                return None
+            return [divmod(int(tile_index), self.grid_size) for tile_index in moves]
 
-    def solve_single_puzzle(self, initial_state: Tuple[int, ...]) -> List[Tuple[int, ...]]:
-        path_of_moves = self.solve_with_a_star(initial_state)
+    def solve_single_puzzle(self, initial_code: int) -> List[int]:
+        path_of_moves = self.solve_with_a_star(initial_code)
         if path_of_moves is None: return []
-        if not path_of_moves: return [initial_state]
-        path_of_states = [initial_state]
-        current_state_list = list(initial_state)
+        if not path_of_moves: return [initial_code]
+        path_of_codes = [initial_code]
+        current_code = initial_code
+        empty_index = find_empty(initial_code, self.vector_dim)
         for move in path_of_moves:
-            empty_index = current_state_list.index(0)
             tile_r, tile_c = move
             tile_index = tile_r * self.grid_size + tile_c
-            current_state_list[empty_index], current_state_list[tile_index] = current_state_list[tile_index], current_state_list[empty_index]
-            path_of_states.append(tuple(current_state_list))
-        return path_of_states
-
-    def get_neighbors(self, state: Tuple[int, ...]) -> List[Tuple[int, ...]]:
-        neighbors = []
-        empty_index = state.index(0)
-        empty_r, empty_c = divmod(empty_index, self.grid_size)
-        for dr, dc in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-            tile_r, tile_c = empty_r + dr, empty_c + dc
-            if 0 <= tile_r < self.grid_size and 0 <= tile_c < self.grid_size:
-                tile_index = tile_r * self.grid_size + tile_c
-                new_state = list(state)
-                new_state[empty_index], new_state[tile_index] = new_state[tile_index], new_state[empty_index]
-                neighbors.append(tuple(new_state))
-        return neighbors
-
-    def generate_puzzle_states(self, num_puzzles: int) -> set:
-        print(f"Generating {num_puzzles} puzzle states via breadth-first walk from goal...")
-        puzzle_states = {self.goal_state}
-        queue = deque([self.goal_state])
-        pbar = tqdm(total=num_puzzles, desc="Generating States")
-        while len(puzzle_states) < num_puzzles and queue:
-            current_state = queue.popleft()
-            if len(puzzle_states) >= num_puzzles:
-                pbar.update(num_puzzles - pbar.n)
-                break
-            for neighbor in self.get_neighbors(current_state):
-                if neighbor not in puzzle_states:
-                    puzzle_states.add(neighbor)
-                    pbar.update(1)
-                    queue.append(neighbor)
-        pbar.close()
-        return puzzle_states
+            tile = (current_code >> (4 * tile_index)) & 0xF
+            current_code ^= (tile << (4 * empty_index)) ^ (tile << (4 * tile_index))
+            empty_index = tile_index
+            path_of_codes.append(current_code)
+        return path_of_codes
+
+    def expand_frontier(self, codes: np.ndarray, empty: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns every neighbor of every packed state in `codes` (duplicates included),
+        together with the move leading back to the state it was expanded from and
+        the neighbor's empty position. `empty` holds the empty position of each
+        state in `codes`.
+        States are bucketed by empty position so each bucket is expanded with a
+        handful of vectorized nibble swaps instead of a Python loop per state.
+        """
+        children, moves_back, children_empty = [], [], []
+        for empty_index, moves in enumerate(self.neighbor_masks):
+            bucket = codes[empty == empty_index]
+            if not bucket.size: continue
+            for tile_index, empty_shift, tile_shift in moves:
+                tiles = (bucket >> np.uint64(tile_shift)) & np.uint64(0xF)
+                children.append(bucket ^ (tiles << np.uint64(empty_shift)) ^ (tiles << np.uint64(tile_shift)))
+                # The empty cell moves to where the slid tile was, and sliding the
+                # tile back out of the old empty cell undoes the move.
+                moves_back.append(np.full(bucket.size, empty_index, dtype=np.uint8))
+                children_empty.append(np.full(bucket.size, tile_index, dtype=np.int8))
+        if not children:
+            return np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.uint8), np.empty(0, dtype=np.int8)
+        return np.concatenate(children), np.concatenate(moves_back), np.concatenate(children_empty)
 
     def build_solution_database(self, num_puzzles: int):
-        puzzle_states = self.generate_puzzle_states(num_puzzles)
-        print("\nSolving puzzles and building database...")
-        solutions_found = 0
-        for state in tqdm(puzzle_states, desc="Solving and Storing"):
-            solution_path = self.solve_single_puzzle(state)
-            if solution_path:
-                self.add_solution_to_database(state, solution_path)
-                solutions_found += 1
-        print(f"Successfully solved and stored {solutions_found} puzzles")
-
-    def add_solution_to_database(self, state, solution_path):
-        if self.index is None: self.initialize_faiss_index()
-        vector = self.state_to_vector(state)
-        faiss_id = self.index.ntotal
-        self.index.add(vector)
-        self.state_to_id[state] = faiss_id
-        self.id_to_state[faiss_id] = state
-        self.solutions[state] = solution_path
-
-    def solve_using_database(self, query_state: Tuple[int, ...]) -> List[Tuple[int, ...]]:
-        if query_state in self.solutions:
+        """
+        Builds optimal solutions for the `num_puzzles` states closest to the goal
+        with a single breadth-first search outward from the goal. The move graph is
+        undirected and unweighted, so the state a node was first reached from is
+        one optimal step closer to the goal, and following those parent links is
+        an optimal solution path. No per-state search is needed.
+        """
+        print(f"Building solutions for {num_puzzles} puzzle states via breadth-first search from goal...")
+        # BFS one level at a time: `visited` is kept sorted so membership tests
+        # and merges are single NumPy passes over contiguous uint64 arrays.
+        frontier = np.array([self.goal_code], dtype=np.uint64)
+        frontier_empty = np.array([self.vector_dim - 1], dtype=np.int8)
+        visited = frontier
+        # Each level's (codes, moves) arrays are kept as-is and merged once at
+        # the end, so no per-state Python objects are created.
+        level_codes, level_moves = [frontier], [np.array([NO_MOVE], dtype=np.uint8)]
+        pbar = tqdm(total=num_puzzles, desc="Building Solutions")
+        pbar.update(1)
+        while len(visited) < num_puzzles and frontier.size:
+            children, moves, children_empty = self.expand_frontier(frontier, frontier_empty)
+            children, first_seen = np.unique(children, return_index=True)
+            moves, children_empty = moves[first_seen], children_empty[first_seen]
+            is_new = ~np.isin(children, visited, assume_unique=True)
+            children = children[is_new][:num_puzzles - len(visited)]
+            moves = moves[is_new][:children.size]
+            children_empty = children_empty[is_new][:children.size]
+            level_codes.append(children)
+            level_moves.append(moves)
+            pbar.update(children.size)
+            visited = np.union1d(visited, children)
+            frontier, frontier_empty = children, children_empty
+        pbar.close()
+        self.db_moves = np.full(math.factorial(self.vector_dim), NOT_IN_DATABASE, dtype=np.uint8)
+        self.db_moves[rank_states(np.concatenate(level_codes), self.vector_dim)] = np.concatenate(level_moves)
+        self.db_size = len(visited)
+        print(f"Successfully solved and stored {len(visited)} puzzles")
+
+    def add_solution_to_database(self, solution_path: List[int]):
+        """
+        Records a solved path in `new_solutions`. This is the only method that
+        mutates the database; the API calls it from a single writer task.
+        """
+        # Every suffix of a solution path solves the state it starts from, so each
+        # state on it can point at its successor. Existing entries are kept.
+        for current_code, next_code in zip(solution_path, solution_path[1:]):
+            if self.lookup_parent(current_code) is None:
+                self.new_solutions[current_code] = next_code
+        if self.lookup_parent(self.goal_code) is None:
+            self.new_solutions[self.goal_code] = self.goal_code
+
+    def reconstruct_solution_path(self, code: int) -> List[int]:
+        path = [code]
+        while code != self.goal_code:
+            code = self.lookup_parent(code)
+            path.append(code)
+        return path
+
+    def is_solvable(self, code: int) -> bool:
+        """
+        Checks the inversion-parity invariant that every move preserves, so only
+        half of all permutations can reach the goal.
+        """
+        tiles = [num for num in decode_state(code, self.vector_dim) if num != 0]
+        inversions = sum(1 for i, a in enumerate(tiles) for b in tiles[i + 1:] if a > b)
+        if self.grid_size % 2 == 0:
+            # On even widths a vertical move also flips parity; count the empty row.
+            inversions += find_empty(code, self.vector_dim) // self.grid_size - (self.grid_size - 1)
+        return inversions % 2 == 0
+
+    def solve_using_database(self, query_code: int) -> List[int]:
+        """
+        Returns the solution path for a state without modifying the database.
+        Callers hand newly solved paths to add_solution_to_database.
+        """
+        if self.lookup_parent(query_code) is not None:
             print("Found exact solution in database.")
-            return self.solutions[query_state]
+            return self.reconstruct_solution_path(query_code)
+        if not self.is_solvable(query_code):
+            print("Puzzle state is unsolvable (odd permutation parity).")
+            return []
         print("No exact match in DB. Solving puzzle directly...")
-        solution_path = self.solve_single_puzzle(query_state)
-        if solution_path:
-            print("New puzzle solved! Adding solution to in-memory database.")
-            self.add_solution_to_database(query_state, solution_path)
-        else:
+        solution_path = self.solve_single_puzzle(query_code)
+        if not solution_path:
             print("Direct A* solver could not find a solution for this state.")
         return solution_path
 
@@ -1,13 +1,30 @@
 from pybind11.setup_helpers import Pybind11Extension, build_ext
 from setuptools import setup
 import glob
+import os
 
 cpp_files = glob.glob("cpp-solver/src/bindings.cpp")
 
+# -march=native tunes for the build machine, so build on the host that runs the API.
+compile_args = ["-O3", "-march=native", "-flto", "-funroll-loops", "-fno-plt", "-DNDEBUG"]
+link_args = ["-flto"]
+
+# Optional profile-guided build: compile with PGO=generate, run a representative
+# workload through cpp_solver, then rebuild with PGO=use (see README).
+pgo_mode = os.getenv("PGO")
+if pgo_mode == "generate":
+    compile_args.append("-fprofile-generate")
+    link_args.append("-fprofile-generate")
+elif pgo_mode == "use":
+    compile_args += ["-fprofile-use", "-fprofile-correction"]
+    link_args.append("-fprofile-use")
+
 ext_modules = [
     Pybind11Extension(
         "cpp_solver",  # Name of your Python module
-        cpp_files
+        cpp_files,
+        extra_compile_args=compile_args,
+        extra_link_args=link_args,
     ),
 ]
 
@@ -16,4 +33,4 @@ setup(
     ext_modules=ext_modules,
     cmdclass={"build_ext": build_ext},
     zip_safe=True
-)
\ No newline at end of file
+)